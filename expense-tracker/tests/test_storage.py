@@ -0,0 +1,291 @@
+"""
+Tests for the storage layer: on-disk format, WAL replay and recovery.
+
+Run from the expense-tracker directory:
+    python -m unittest discover tests
+"""
+
+import gc
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+
+from tracker import storage
+from tracker.models import Expense
+from tracker.storage import ExpenseStorage
+
+
+def make_expense(expense_id: str, amount: float = 10.0, note: str = "") -> Expense:
+    """Build an expense with fixed ID and timestamp."""
+    return Expense(
+        date="2026-01-26",
+        category="food",
+        amount=amount,
+        note=note,
+        expense_id=expense_id,
+        created_at="2026-01-26T10:00:00"
+    )
+
+
+class StorageTestCase(unittest.TestCase):
+    """Base case with a fresh data directory per test."""
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+    
+    def open_storage(self) -> ExpenseStorage:
+        """Open a new storage instance, as a new CLI process would."""
+        return ExpenseStorage(data_dir=self.data_dir)
+    
+    def stored_ids(self):
+        """IDs as seen by a fresh storage instance."""
+        return [e.id for e in self.open_storage().load_expenses()]
+    
+    def read_wal(self, store: ExpenseStorage) -> bytes:
+        with open(store.wal_path, 'rb') as f:
+            return f.read()
+    
+    def write_wal(self, store: ExpenseStorage, data: bytes):
+        with open(store.wal_path, 'wb') as f:
+            f.write(data)
+
+
+class RoundTripMixin:
+    """Round-trip checks run once per JSON backend."""
+    
+    def test_round_trip_through_wal_and_checkpoint(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A", 250.5, note="দুপুরের খাবার"))
+            store.save_expense(make_expense("B", 80))
+        
+        expected = [make_expense("A", 250.5, note="দুপুরের খাবার").to_dict(),
+                    make_expense("B", 80).to_dict()]
+        self.assertEqual([e.to_dict() for e in self.open_storage().load_expenses()], expected)
+        
+        store = self.open_storage()
+        store.checkpoint()
+        self.assertFalse(os.path.exists(store.wal_path))
+        self.assertEqual([e.to_dict() for e in self.open_storage().load_expenses()], expected)
+    
+    def test_non_finite_amounts_round_trip(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A", float("inf")))
+            store.save_expense(make_expense("B", float("nan")))
+        
+        amounts = [e.amount for e in self.open_storage().load_expenses()]
+        self.assertTrue(math.isinf(amounts[0]))
+        self.assertTrue(math.isnan(amounts[1]))
+        
+        self.open_storage().checkpoint()
+        amounts = [e.amount for e in self.open_storage().load_expenses()]
+        self.assertTrue(math.isinf(amounts[0]))
+        self.assertTrue(math.isnan(amounts[1]))
+    
+    def test_loads_file_with_infinity_written_by_stdlib(self):
+        record = make_expense("A").to_dict()
+        record["amount"] = float("inf")
+        with open(os.path.join(self.data_dir, "expenses.json"), 'w') as f:
+            json.dump({"version": 1, "expenses": [record]}, f, indent=2)
+        
+        self.assertTrue(math.isinf(self.open_storage().load_expenses()[0].amount))
+
+
+class StdlibRoundTripTests(RoundTripMixin, StorageTestCase):
+    """Round trips with orjson unavailable."""
+    
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(storage, "orjson", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(storage.orjson is None, "orjson is not installed")
+class OrjsonRoundTripTests(RoundTripMixin, StorageTestCase):
+    """Round trips with orjson in use."""
+
+
+class WalTests(StorageTestCase):
+    """Write-ahead log replay and recovery."""
+    
+    def test_changes_go_to_wal_until_checkpoint(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        
+        with open(store.filepath) as f:
+            self.assertEqual(json.load(f)["expenses"], [])
+        self.assertEqual(len(self.read_wal(store).splitlines()), 2)
+        
+        with self.open_storage() as store:
+            self.assertTrue(store.update_expense("A", make_expense("A", 99)))
+            self.assertTrue(store.delete_expense("B"))
+        
+        expenses = self.open_storage().load_expenses()
+        self.assertEqual([(e.id, e.amount) for e in expenses], [("A", 99.0)])
+    
+    def test_missing_ids_are_not_logged(self):
+        with self.open_storage() as store:
+            self.assertFalse(store.delete_expense("nope"))
+            self.assertFalse(store.update_expense("nope", make_expense("nope")))
+        
+        self.assertFalse(os.path.exists(store.wal_path))
+    
+    def test_crash_between_checkpoint_and_wal_removal(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        stale_wal = self.read_wal(store)
+        
+        # Checkpoint, then put the WAL back as if removing it had failed
+        self.open_storage().checkpoint()
+        self.write_wal(store, stale_wal)
+        
+        self.assertEqual(self.stored_ids(), ["A", "B"])
+        
+        # New records after the stale ones still apply
+        with self.open_storage() as store:
+            store.save_expense(make_expense("C"))
+        self.assertEqual(self.stored_ids(), ["A", "B", "C"])
+    
+    def test_crash_after_replacing_all_expenses(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        stale_wal = self.read_wal(store)
+        
+        # Replace everything from a storage that never loaded, then put the
+        # WAL back as if removing it had failed
+        with self.open_storage() as store:
+            store.save_all_expenses([make_expense("Z")])
+        self.write_wal(store, stale_wal)
+        
+        self.assertEqual(self.stored_ids(), ["Z"])
+    
+    def test_torn_tail_is_ignored_on_replay(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        wal = self.read_wal(store)
+        self.write_wal(store, wal[:-20])
+        
+        self.assertEqual(self.stored_ids(), ["A"])
+    
+    def test_torn_tail_inside_multibyte_character_is_ignored(self):
+        note = "দুপুরের খাবার"
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A", note=note))
+            store.save_expense(make_expense("B", note=note))
+        wal = self.read_wal(store)
+        last_line = wal.rindex(b"\n", 0, len(wal) - 1) + 1
+        cut = wal.index(note.encode('utf-8'), last_line) + 1
+        self.write_wal(store, wal[:cut])
+        
+        self.assertEqual(self.stored_ids(), ["A"])
+    
+    def test_torn_tail_is_trimmed_before_next_append(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        wal = self.read_wal(store)
+        self.write_wal(store, wal[:-20])
+        
+        with self.open_storage() as store:
+            store.save_expense(make_expense("C"))
+        
+        self.assertTrue(self.read_wal(store).endswith(b"\n"))
+        self.assertEqual(self.stored_ids(), ["A", "C"])
+    
+    def test_complete_final_line_without_newline_is_torn(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        wal = self.read_wal(store)
+        self.write_wal(store, wal[:-1])
+        
+        # Replay and the next append agree: B never became durable
+        self.assertEqual(self.stored_ids(), ["A"])
+        with self.open_storage() as store:
+            store.save_expense(make_expense("C"))
+        self.assertEqual(self.stored_ids(), ["A", "C"])
+    
+    def test_corrupted_middle_line_raises(self):
+        with self.open_storage() as store:
+            store.save_expense(make_expense("A"))
+            store.save_expense(make_expense("B"))
+        lines = self.read_wal(store).split(b"\n")
+        lines[0] = b"#" + lines[0][1:]
+        self.write_wal(store, b"\n".join(lines))
+        
+        with self.assertRaisesRegex(Exception, "Corrupted write-ahead log"):
+            self.open_storage().load_expenses()
+    
+    def test_auto_checkpoint_past_threshold(self):
+        with self.open_storage() as store:
+            store.WAL_CHECKPOINT_BYTES = 1
+            store.save_expense(make_expense("A"))
+        self.assertTrue(os.path.exists(store.wal_path))
+        
+        # The next flush finds the WAL over the threshold and folds it in
+        with self.open_storage() as store:
+            store.WAL_CHECKPOINT_BYTES = 1
+            store.save_expense(make_expense("B"))
+        
+        self.assertFalse(os.path.exists(store.wal_path))
+        with open(store.filepath) as f:
+            data = json.load(f)
+        self.assertEqual([e["id"] for e in data["expenses"]], ["A", "B"])
+        self.assertEqual(data["wal_seq"], 2)
+        self.assertEqual(self.stored_ids(), ["A", "B"])
+
+
+class FormatTests(StorageTestCase):
+    """Data file format compatibility."""
+    
+    def test_legacy_list_format_loads(self):
+        with open(os.path.join(self.data_dir, "expenses.json"), 'w') as f:
+            json.dump([make_expense("A").to_dict()], f)
+        
+        self.assertEqual(self.stored_ids(), ["A"])
+    
+    def test_missing_file_is_created_empty(self):
+        store = self.open_storage()
+        self.assertEqual(store.load_expenses(), [])
+        self.assertTrue(os.path.exists(store.filepath))
+
+
+
+class LifecycleTests(StorageTestCase):
+    """Exit-time flushing."""
+    
+    def test_exit_hook_does_not_keep_storage_alive(self):
+        store = self.open_storage()
+        store.load_expenses()
+        ref = weakref.ref(store)
+        del store
+        gc.collect()
+        
+        self.assertIsNone(ref())
+    
+    def test_exit_hook_flushes_and_logs_failures(self):
+        store = self.open_storage()
+        store.save_expense(make_expense("A"))
+        store._exit_hook()
+        self.assertEqual(self.stored_ids(), ["A"])
+        
+        store.save_expense(make_expense("B"))
+        with mock.patch.object(store, "flush", side_effect=Exception("disk full")), \
+                mock.patch("tracker.logger.log_error") as log_error:
+            store._exit_hook()
+        log_error.assert_called_once_with("FlushError", "disk full")
+        store.flush()
+
+
+if __name__ == "__main__":
+    unittest.main()
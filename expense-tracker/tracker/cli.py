@@ -5,30 +5,57 @@ CLI interface with argparse commands.
 import argparse
 import sys
 from datetime import date
-from tracker.models import Expense
-from tracker.service import ExpenseService
-from tracker.logger import log_command, log_validation_error, log_error
+from typing import TYPE_CHECKING
+
+# Service, storage and logger modules are imported lazily once a command is
+# known, so `--help` and argument errors never touch data/ or logs/
+if TYPE_CHECKING:
+    from tracker.service import ExpenseService
+
+
+# Command name -> one-line help, shown by `tracker --help`
+COMMANDS = {
+    'add': 'Add a new expense',
+    'list': 'List expenses with filters',
+    'summary': 'Generate expense summary',
+    'delete': 'Delete an expense',
+    'edit': 'Edit an expense',
+    'export': 'Print all expenses as JSON',
+}
 
 
 def create_parser():
-    """Create and configure argument parser."""
+    """Create the top-level parser, which only recognizes the command name."""
+    epilog = "commands:\n" + "\n".join(f"  {name:10} {text}" for name, text in COMMANDS.items())
     parser = argparse.ArgumentParser(
         prog='tracker',
-        description='Expense Tracker - Track your expenses from the command line'
+        description='Expense Tracker - Track your expenses from the command line',
+        epilog=epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter
     )
-    
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
-    
-    # Add command
-    add_parser = subparsers.add_parser('add', help='Add a new expense')
+    parser.add_argument('command', nargs='?', choices=list(COMMANDS), metavar='command', help='Available commands')
+    return parser
+
+
+def _command_parser(command: str):
+    """Create an empty parser for a single command."""
+    return argparse.ArgumentParser(prog=f'tracker {command}', description=COMMANDS[command])
+
+
+def _build_add_parser():
+    """Build the parser for the add command."""
+    add_parser = _command_parser('add')
     add_parser.add_argument('--date', type=str, default=None, help='Date (YYYY-MM-DD), default: today')
     add_parser.add_argument('--category', type=str, required=True, help='Category (e.g., food, transport, rent)')
     add_parser.add_argument('--amount', type=float, required=True, help='Amount (must be positive)')
     add_parser.add_argument('--note', type=str, default='', help='Optional note/description')
     add_parser.add_argument('--currency', type=str, default='BDT', help='Currency code (default: BDT)')
-    
-    # List command
-    list_parser = subparsers.add_parser('list', help='List expenses with filters')
+    return add_parser
+
+
+def _build_list_parser():
+    """Build the parser for the list command."""
+    list_parser = _command_parser('list')
     list_parser.add_argument('--month', type=str, help='Filter by month (YYYY-MM)')
     list_parser.add_argument('--category', type=str, help='Filter by category')
     list_parser.add_argument('--min', type=float, dest='min_amount', help='Minimum amount')
@@ -36,32 +63,87 @@ def create_parser():
     list_parser.add_argument('--sort', type=str, choices=['date', 'amount', 'category'], help='Sort by field')
     list_parser.add_argument('--desc', '-desc', action='store_true', help='Sort in descending order')
     list_parser.add_argument('--limit', '-limit', type=int, help='Limit number of results')
-    
-    # Summary command
-    summary_parser = subparsers.add_parser('summary', help='Generate expense summary')
+    return list_parser
+
+
+def _build_summary_parser():
+    """Build the parser for the summary command."""
+    summary_parser = _command_parser('summary')
     summary_parser.add_argument('--month', type=str, help='Filter by month (YYYY-MM)')
     summary_parser.add_argument('--from', type=str, dest='from_date', help='Start date (YYYY-MM-DD)')
     summary_parser.add_argument('--to', type=str, dest='to_date', help='End date (YYYY-MM-DD)')
     summary_parser.add_argument('--category', type=str, help='Filter by category')
-    
-    # Delete command (optional)
-    delete_parser = subparsers.add_parser('delete', help='Delete an expense')
+    return summary_parser
+
+
+def _build_delete_parser():
+    """Build the parser for the delete command."""
+    delete_parser = _command_parser('delete')
     delete_parser.add_argument('--id', type=str, required=True, dest='expense_id', help='Expense ID to delete')
-    
-    # Edit command (optional)
-    edit_parser = subparsers.add_parser('edit', help='Edit an expense')
+    return delete_parser
+
+
+def _build_edit_parser():
+    """Build the parser for the edit command."""
+    edit_parser = _command_parser('edit')
     edit_parser.add_argument('--id', type=str, required=True, dest='expense_id', help='Expense ID to edit')
     edit_parser.add_argument('--amount', type=float, help='New amount')
     edit_parser.add_argument('--note', type=str, help='New note')
     edit_parser.add_argument('--category', type=str, help='New category')
     edit_parser.add_argument('--date', type=str, help='New date (YYYY-MM-DD)')
+    return edit_parser
+
+
+def _build_export_parser():
+    """Build the parser for the export command."""
+    export_parser = _command_parser('export')
+    export_parser.add_argument('--compact', action='store_true', help='Print without indentation')
+    return export_parser
+
+
+PARSER_BUILDERS = {
+    'add': _build_add_parser,
+    'list': _build_list_parser,
+    'summary': _build_summary_parser,
+    'delete': _build_delete_parser,
+    'edit': _build_edit_parser,
+    'export': _build_export_parser,
+}
+
+
+def parse_args(argv=None):
+    """
+    Parse command line arguments in two phases.
     
-    return parser
+    The command name is resolved first; only that command's parser is then
+    built and used for the remaining arguments.
+    
+    Args:
+        argv: Argument list (default: sys.argv[1:])
+        
+    Returns:
+        Parsed arguments namespace with `command` set
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    
+    if not argv or argv[0] not in PARSER_BUILDERS:
+        # No command, top-level --help, or unknown command
+        parser = create_parser()
+        parser.parse_args(argv)
+        parser.print_help()
+        sys.exit(1)
+    
+    command = argv[0]
+    namespace = argparse.Namespace(command=command)
+    return PARSER_BUILDERS[command]().parse_args(argv[1:], namespace=namespace)
 
 
-def handle_add(service: ExpenseService, args):
+def handle_add(service: 'ExpenseService', args):
     """Handle add command."""
-    log_command('add', vars(args))
+    from tracker.models import Expense
+    from tracker.logger import log_command
+    
+    log_command('add', args)
     
     # Use today's date if not provided
     expense_date = args.date if args.date else date.today().strftime('%Y-%m-%d')
@@ -86,12 +168,14 @@ def handle_add(service: ExpenseService, args):
         raise ValueError(str(e))
 
 
-def handle_list(service: ExpenseService, args):
+def handle_list(service: 'ExpenseService', args):
     """Handle list command."""
-    log_command('list', vars(args))
+    from tracker.logger import log_command
+    
+    log_command('list', args)
     
     # Get expenses with filters
-    expenses = service.list_expenses(
+    result = service.list_expenses(
         month=args.month,
         category=args.category,
         min_amount=args.min_amount,
@@ -102,20 +186,23 @@ def handle_list(service: ExpenseService, args):
     )
     
     # Display results
-    if not expenses:
+    if not result.expenses:
         print("No expenses found")
     else:
-        print(f"Found {len(expenses)} expense(s):")
+        print(f"Found {result.count} expense(s):")
         print("-" * 80)
-        for expense in expenses:
+        for expense in result.expenses:
             print(expense)
         print("-" * 80)
-        print(f"Total: {sum(e.amount for e in expenses):.2f} BDT")
+        print(f"Total: {result.total:.2f} BDT")
 
 
-def handle_summary(service: ExpenseService, args):
+def handle_summary(service: 'ExpenseService', args):
     """Handle summary command."""
-    log_command('summary', vars(args))
+    from tracker.logger import log_command
+    from tracker.utils import format_summary_output
+    
+    log_command('summary', args)
     
     # Generate summary
     summary = service.summary(
@@ -126,26 +213,14 @@ def handle_summary(service: ExpenseService, args):
     )
     
     # Display summary
-    print("=" * 60)
-    print("EXPENSE SUMMARY")
-    print("=" * 60)
-    print(f"Total Expenses: {summary['count']}")
-    print(f"Grand Total: {summary['grand_total']:.2f} BDT")
-    print()
-    
-    if summary['totals_by_category']:
-        print("By Category:")
-        print("-" * 60)
-        for category, total in sorted(summary['totals_by_category'].items()):
-            print(f"  {category.capitalize():20} {total:>10.2f} BDT")
-        print("=" * 60)
-    else:
-        print("No expenses found")
+    print(format_summary_output(summary))
 
 
-def handle_delete(service: ExpenseService, args):
+def handle_delete(service: 'ExpenseService', args):
     """Handle delete command."""
-    log_command('delete', vars(args))
+    from tracker.logger import log_command
+    
+    log_command('delete', args)
     
     success = service.delete_expense(args.expense_id)
     
@@ -156,9 +231,11 @@ def handle_delete(service: ExpenseService, args):
         sys.exit(1)
 
 
-def handle_edit(service: ExpenseService, args):
+def handle_edit(service: 'ExpenseService', args):
     """Handle edit command."""
-    log_command('edit', vars(args))
+    from tracker.logger import log_command
+    
+    log_command('edit', args)
     
     # Check if at least one field is being updated
     if not any([args.amount, args.note is not None, args.category, args.date]):
@@ -180,31 +257,41 @@ def handle_edit(service: ExpenseService, args):
         sys.exit(1)
 
 
+def handle_export(service: 'ExpenseService', args):
+    """Handle export command."""
+    from tracker.logger import log_command
+    
+    log_command('export', args)
+    
+    print(service.export_expenses(pretty=not args.compact))
+
+
+HANDLERS = {
+    'add': handle_add,
+    'list': handle_list,
+    'summary': handle_summary,
+    'delete': handle_delete,
+    'edit': handle_edit,
+    'export': handle_export,
+}
+
+
 def run():
     """Main CLI entry point."""
-    parser = create_parser()
-    args = parser.parse_args()
-    
-    # Show help if no command provided
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
+    args = parse_args()
     
-    # Initialize service
-    service = ExpenseService()
+    from tracker.service import ExpenseService
+    from tracker.storage import ExpenseStorage
+    from tracker.logger import log_error
     
     # Execute command
     try:
-        if args.command == 'add':
-            handle_add(service, args)
-        elif args.command == 'list':
-            handle_list(service, args)
-        elif args.command == 'summary':
-            handle_summary(service, args)
-        elif args.command == 'delete':
-            handle_delete(service, args)
-        elif args.command == 'edit':
-            handle_edit(service, args)
+        # Changes are written to disk once, when the command finishes
+        with ExpenseStorage() as storage:
+            service = ExpenseService(storage)
+            handler = HANDLERS.get(args.command)
+            if handler:
+                handler(service, args)
             
     except Exception as e:
         print(f"Error: {e}")
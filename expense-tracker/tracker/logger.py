@@ -1,6 +1,36 @@
+import atexit
 import logging
 import os
 from datetime import datetime
+from functools import lru_cache
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that batches writes instead of flushing every record.
+    
+    Records accumulate in the file stream's buffer and reach disk when it
+    fills, when an ERROR (or worse) is logged, or when the handler is
+    flushed/closed at exit.
+    """
+    
+    def emit(self, record: logging.LogRecord):
+        """
+        Write a record to the stream without a per-record flush.
+        
+        Args:
+            record: Log record to write
+        """
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
 
 
 def setup_logger(name: str = "tracker", log_dir: str = "logs", log_file: str = "tracker.log") -> logging.Logger:
@@ -27,10 +57,11 @@ def setup_logger(name: str = "tracker", log_dir: str = "logs", log_file: str = "
     if logger.handlers:
         return logger
     
-    # Create file handler
+    # Create file handler (buffered; flushed on errors and at exit)
     log_path = os.path.join(log_dir, log_file)
-    file_handler = logging.FileHandler(log_path, encoding='utf-8')
+    file_handler = BufferedFileHandler(log_path, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
+    atexit.register(file_handler.flush)
     
     # Create console handler (for errors and warnings)
     console_handler = logging.StreamHandler()
@@ -53,20 +84,49 @@ def setup_logger(name: str = "tracker", log_dir: str = "logs", log_file: str = "
     return logger
 
 
-# Create a default logger instance for the application
-logger = setup_logger()
+@lru_cache(maxsize=1)
+def _get() -> logging.Logger:
+    """
+    Return the application logger, configuring it on first use.
+    
+    Deferring setup means invocations that never log (e.g. --help) skip
+    creating the logs directory and opening the log file.
+    
+    Returns:
+        Configured logger instance
+    """
+    return setup_logger()
+
+
+def __getattr__(name: str):
+    # Keep `tracker.logger.logger` available without configuring it at import
+    if name == "logger":
+        return _get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def log_command(command: str, args: dict = None):
+def log_command(command: str, args=None):
     """
     Log a CLI command execution.
     
+    Formatting (and converting a namespace to a dict) only happens when
+    INFO records are enabled.
+    
     Args:
         command: Command name (e.g., 'add', 'list', 'summary')
-        args: Command arguments as dictionary
+        args: Command arguments as dictionary or argparse namespace
     """
-    args_str = f" with args {args}" if args else ""
-    logger.info(f"Command '{command}' executed{args_str}")
+    logger = _get()
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
+    if args is not None and not isinstance(args, dict):
+        args = vars(args)
+    
+    if args:
+        logger.info("Command '%s' executed with args %s", command, args)
+    else:
+        logger.info("Command '%s' executed", command)
 
 
 def log_validation_error(field: str, value: any, error: str):
@@ -78,7 +138,7 @@ def log_validation_error(field: str, value: any, error: str):
         value: Value that was validated
         error: Error message
     """
-    logger.warning(f"Validation error - {field}='{value}': {error}")
+    _get().warning(f"Validation error - {field}='{value}': {error}")
 
 
 def log_file_operation(operation: str, filepath: str, success: bool = True, error: str = None):
@@ -92,9 +152,9 @@ def log_file_operation(operation: str, filepath: str, success: bool = True, erro
         error: Error message if failed
     """
     if success:
-        logger.info(f"File {operation} successful: {filepath}")
+        _get().info(f"File {operation} successful: {filepath}")
     else:
-        logger.error(f"File {operation} failed: {filepath} - {error}")
+        _get().error(f"File {operation} failed: {filepath} - {error}")
 
 
 def log_expense_added(expense_id: str, category: str, amount: float):
@@ -106,7 +166,7 @@ def log_expense_added(expense_id: str, category: str, amount: float):
         category: Category of expense
         amount: Amount of expense
     """
-    logger.info(f"Expense added: {expense_id} | {category} | {amount}")
+    _get().info(f"Expense added: {expense_id} | {category} | {amount}")
 
 
 def log_expense_deleted(expense_id: str, success: bool = True):
@@ -118,9 +178,9 @@ def log_expense_deleted(expense_id: str, success: bool = True):
         success: Whether deletion succeeded
     """
     if success:
-        logger.info(f"Expense deleted: {expense_id}")
+        _get().info(f"Expense deleted: {expense_id}")
     else:
-        logger.warning(f"Expense deletion failed: {expense_id} not found")
+        _get().warning(f"Expense deletion failed: {expense_id} not found")
 
 
 def log_expense_updated(expense_id: str, success: bool = True):
@@ -132,9 +192,9 @@ def log_expense_updated(expense_id: str, success: bool = True):
         success: Whether update succeeded
     """
     if success:
-        logger.info(f"Expense updated: {expense_id}")
+        _get().info(f"Expense updated: {expense_id}")
     else:
-        logger.warning(f"Expense update failed: {expense_id} not found")
+        _get().warning(f"Expense update failed: {expense_id} not found")
 
 
 def log_error(error_type: str, message: str):
@@ -145,7 +205,7 @@ def log_error(error_type: str, message: str):
         error_type: Type of error
         message: Error message
     """
-    logger.error(f"{error_type}: {message}")
+    _get().error(f"{error_type}: {message}")
 
 
 def log_info(message: str):
@@ -155,7 +215,7 @@ def log_info(message: str):
     Args:
         message: Info message
     """
-    logger.info(message)
+    _get().info(message)
 
 
 def log_debug(message: str):
@@ -165,4 +225,4 @@ def log_debug(message: str):
     Args:
         message: Debug message
     """
-    logger.debug(message)
\ No newline at end of file
+    _get().debug(message)
\ No newline at end of file
@@ -1,5 +1,17 @@
+import itertools
+import sys
+from operator import itemgetter
 from datetime import datetime
 from typing import Optional
+from tracker.utils import _NonPositive, parse_date
+
+
+# Per-process ID sequence, seeded once from the start time (HHMMSS) so the
+# first ID keeps the familiar shape and later ones never collide
+_id_counter = itertools.count(int(datetime.now().strftime("%H%M%S")))
+
+# Stored fields in Expense.__init__ argument order, fetched in one C call
+_stored_fields = itemgetter("date", "category", "amount", "note", "currency", "id", "created_at")
 
 
 class Expense:
@@ -13,8 +25,13 @@ class Expense:
         amount: Amount spent (must be positive)
         note: Optional description of the expense
         currency: Currency code (default: BDT)
+        created_at: Creation timestamp in ISO format
+        month: Month prefix of date (YYYY-MM), derived for fast filtering
     """
     
+    # Fixed attribute layout: no per-instance __dict__, faster attribute access
+    __slots__ = ("id", "date", "category", "amount", "note", "currency", "created_at", "month")
+    
     def __init__(
         self,
         date: str,
@@ -41,6 +58,7 @@ class Expense:
             ValueError: If validation fails
         """
         self.date = self._validate_date(date)
+        self.month = self.date[:7]
         self.category = self._validate_category(category)
         self.amount = self._validate_amount(amount)
         self.note = note
@@ -62,11 +80,7 @@ class Expense:
         Raises:
             ValueError: If date format is invalid
         """
-        try:
-            datetime.strptime(date, "%Y-%m-%d")
-            return date
-        except ValueError:
-            raise ValueError("date must be YYYY-MM-DD")
+        return parse_date(date)
     
     def _validate_category(self, category: str) -> str:
         """
@@ -76,14 +90,16 @@ class Expense:
             category: Category string to validate
             
         Returns:
-            Validated category string (lowercase)
+            Validated category string (lowercase, interned)
             
         Raises:
             ValueError: If category is empty
         """
         if not category or not category.strip():
             raise ValueError("category cannot be empty")
-        return category.strip().lower()
+        # Interned: few distinct categories are shared by many expenses, so
+        # equality checks and dict lookups can short-circuit on identity
+        return sys.intern(category.strip().lower())
     
     def _validate_amount(self, amount: float) -> float:
         """
@@ -101,11 +117,11 @@ class Expense:
         try:
             amount = float(amount)
             if amount <= 0:
-                raise ValueError("amount must be > 0")
+                raise _NonPositive("amount must be > 0")
             return amount
-        except (TypeError, ValueError) as e:
-            if "amount must be > 0" in str(e):
-                raise
+        except _NonPositive:
+            raise
+        except (TypeError, ValueError):
             raise ValueError("amount must be a valid number")
     
     def _generate_id(self) -> str:
@@ -117,9 +133,8 @@ class Expense:
         """
         # Extract date part without hyphens
         date_part = self.date.replace("-", "")
-        # Generate a timestamp-based sequence number
-        timestamp = datetime.now().strftime("%H%M%S%f")[:6]
-        return f"EXP-{date_part}-{timestamp}"
+        # Take the next sequence number (no clock call per expense)
+        return f"EXP-{date_part}-{next(_id_counter):06d}"
     
     def to_dict(self) -> dict:
         """
@@ -149,6 +164,12 @@ class Expense:
         Returns:
             Expense instance
         """
+        # Fast path: records written by this version carry every field
+        try:
+            return cls(*_stored_fields(data))
+        except KeyError:
+            pass
+        
         return cls(
             date=data["date"],
             category=data["category"],
@@ -1,4 +1,11 @@
-from typing import List, Dict, Optional
+import heapq
+import sys
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import compress, islice
+from operator import attrgetter
 from datetime import datetime
 from tracker.models import Expense
 from tracker.storage import ExpenseStorage
@@ -11,10 +18,124 @@ from tracker.logger import (
 )
 
 
+# Sorts after every character; bounds the range of strings sharing a prefix
+_MAX_CHAR = chr(0x10FFFF)
+
+# Fields `edit` can change, compared to detect no-op edits
+_edited_fields = attrgetter('date', 'category', 'amount', 'note')
+
+
+@lru_cache(maxsize=128)
+def _compile_predicate(
+    month: Optional[str],
+    prefix: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str],
+    category: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float]
+) -> Optional[Callable[[Expense], bool]]:
+    """
+    Build a filter predicate containing only the active clauses.
+    
+    The generated lambda has no per-row `is None` checks; filter values are
+    bound as default arguments (never pasted into the source). Compiled
+    predicates are cached by filter signature.
+    
+    Returns:
+        Predicate function, or None when no filter is active
+    """
+    clauses = {
+        'month': "e.month == month",
+        'prefix': "e.date.startswith(prefix)",
+        'from_date': "e.date >= from_date",
+        'to_date': "e.date <= to_date",
+        'category': "e.category == category",
+        'min_amount': "e.amount >= min_amount",
+        'max_amount': "e.amount <= max_amount"
+    }
+    values = {
+        'month': month,
+        'prefix': prefix,
+        'from_date': from_date,
+        'to_date': to_date,
+        'category': category,
+        'min_amount': min_amount,
+        'max_amount': max_amount
+    }
+    active = [name for name, value in values.items() if value is not None]
+    if not active:
+        return None
+    
+    params = ", ".join(f"{name}={name}" for name in active)
+    body = " and ".join(clauses[name] for name in active)
+    source = f"lambda e, {params}: {body}"
+    return eval(compile(source, "<expense-filter>", "eval"), {}, {name: values[name] for name in active})
+
+
+# Date-sorted (dates, category codes, amounts) plus the sorted category
+# table the codes index into
+_Columns = Tuple[List[str], List[int], List[float], List[str]]
+
+
+def _empty_summary() -> Dict:
+    """Summary of an empty selection."""
+    return {'count': 0, 'grand_total': 0.0, 'totals_by_category': {}}
+
+
+@dataclass
+class ListResult:
+    """
+    Result of a list query.
+    
+    Attributes:
+        expenses: Matching expenses (filtered, sorted and limited)
+        total: Sum of the amounts of the returned expenses
+        count: Number of returned expenses
+    """
+    expenses: List[Expense]
+    total: float
+    count: int
+
+
 class ExpenseService:
     
+    # Map sort field to expense attribute
+    SORT_KEYS = {
+        'date': attrgetter('date'),
+        'amount': attrgetter('amount'),
+        'category': attrgetter('category')
+    }
+    
     def __init__(self, storage: ExpenseStorage = None):
         self.storage = storage if storage else ExpenseStorage()
+        
+        # Columns and the storage generation they were built from
+        self._columns: Optional[_Columns] = None
+        self._columns_generation = None
+    
+    def _load_columns(self) -> _Columns:
+        # Column-wise (dates, category codes, amounts) view of the cached
+        # expenses, so aggregation walks flat lists instead of per-object
+        # attributes. Rows are ordered by date so date ranges can be located
+        # by bisection; categories are small ints into a sorted table.
+        # Storage re-reads the file only when it changed and bumps its
+        # generation whenever its contents change, so that is the only check;
+        # the expenses are only walked (not copied) when a rebuild is due
+        expenses = self.storage.iter_expenses()
+        generation = self.storage.generation
+        if self._columns is None or generation != self._columns_generation:
+            by_date = sorted(expenses, key=self.SORT_KEYS['date'])
+            table = sorted({e.category for e in by_date})
+            code_of = {cat: code for code, cat in enumerate(table)}
+            self._columns = (
+                [e.date for e in by_date],
+                [code_of[e.category] for e in by_date],
+                [e.amount for e in by_date],
+                table
+            )
+            self._columns_generation = generation
+        return self._columns
     
     def add_expense(self, expense: Expense) -> Expense:
  
@@ -35,13 +156,18 @@ class ExpenseService:
         sort_by: str = None,
         descending: bool = False,
         limit: int = None
-    ) -> List[Expense]:
+    ) -> ListResult:
 
         try:
             expenses = self.storage.load_expenses()
             
-            # Apply filters
-            expenses = self._apply_filters(
+            # Nothing stored yet: skip filtering entirely
+            if not expenses:
+                log_info("Listed 0 expense(s)")
+                return ListResult(expenses=[], total=0.0, count=0)
+            
+            # Filter lazily so a limit can stop early
+            matches = self._apply_filters(
                 expenses,
                 month=month,
                 category=category,
@@ -49,16 +175,32 @@ class ExpenseService:
                 max_amount=max_amount
             )
             
-            # Apply sorting
-            if sort_by:
-                expenses = self._sort_expenses(expenses, sort_by, descending)
-            
-            # Apply limit
-            if limit:
-                expenses = expenses[:limit]
+            if limit and limit > 0:
+                # Keep only the first/top `limit` matches
+                if sort_by:
+                    expenses = self._top_expenses(matches, sort_by, descending, limit)
+                else:
+                    expenses = list(islice(matches, limit))
+                total = sum(e.amount for e in expenses)
+            else:
+                # Collect matches and accumulate the total in the same pass
+                expenses = []
+                total = 0.0
+                for e in matches:
+                    expenses.append(e)
+                    total += e.amount
+                
+                # Apply sorting
+                if sort_by:
+                    expenses = self._sort_expenses(expenses, sort_by, descending)
+                
+                # Apply limit
+                if limit:
+                    expenses = expenses[:limit]
+                    total = sum(e.amount for e in expenses)
             
             log_info(f"Listed {len(expenses)} expense(s)")
-            return expenses
+            return ListResult(expenses=expenses, total=total, count=len(expenses))
             
         except Exception as e:
             log_error("ListExpensesError", str(e))
@@ -73,20 +215,23 @@ class ExpenseService:
     ) -> Dict:
 
         try:
-            expenses = self.storage.load_expenses()
+            columns = self._load_columns()
             
-            # Apply filters
-            expenses = self._apply_filters(
-                expenses,
+            # Nothing stored yet: skip filtering
+            if not columns[0]:
+                summary = _empty_summary()
+                log_info(f"Generated summary: {summary['count']} expenses, total {summary['grand_total']}")
+                return summary
+            
+            # Filter and aggregate in a single pass
+            summary = self._filtered_summary(
+                columns,
                 month=month,
                 from_date=from_date,
                 to_date=to_date,
                 category=category
             )
             
-            # Calculate summary
-            summary = self._calculate_summary(expenses)
-            
             log_info(f"Generated summary: {summary['count']} expenses, total {summary['grand_total']}")
             return summary
             
@@ -129,6 +274,11 @@ class ExpenseService:
                 expense_id=existing.id
             )
             
+            # Edit that changes nothing: skip the storage write entirely
+            if _edited_fields(updated_expense) == _edited_fields(existing):
+                log_info(f"Expense unchanged: {expense_id}")
+                return True
+            
             success = self.storage.update_expense(expense_id, updated_expense)
             log_expense_updated(expense_id, success)
             return success
@@ -137,6 +287,15 @@ class ExpenseService:
             log_error("UpdateExpenseError", str(e))
             raise
     
+    def export_expenses(self, pretty: bool = True) -> str:
+        try:
+            document = self.storage.export(pretty=pretty)
+            log_info("Exported expenses")
+            return document
+        except Exception as e:
+            log_error("ExportError", str(e))
+            raise
+    
     def _apply_filters(
         self,
         expenses: List[Expense],
@@ -146,31 +305,31 @@ class ExpenseService:
         category: str = None,
         min_amount: float = None,
         max_amount: float = None
-    ) -> List[Expense]:
+    ) -> Iterator[Expense]:
 
-        filtered = expenses
-        
-        # Filter by month
-        if month:
-            filtered = [e for e in filtered if e.date.startswith(month)]
+        # Normalize and intern the category once; stored categories are already
+        # lowercase, so the per-row check is a plain (often identity) comparison
+        cat_lower = sys.intern(category.lower()) if category else None
         
-        # Filter by date range
-        if from_date:
-            filtered = [e for e in filtered if e.date >= from_date]
-        if to_date:
-            filtered = [e for e in filtered if e.date <= to_date]
+        # A full YYYY-MM month compares against the precomputed month prefix;
+        # anything shorter (e.g. a bare year) keeps prefix matching
+        exact_month = month if month and len(month) == 7 else None
+        prefix = month if month and not exact_month else None
         
-        # Filter by category
-        if category:
-            filtered = [e for e in filtered if e.category.lower() == category.lower()]
+        predicate = _compile_predicate(
+            exact_month,
+            prefix,
+            from_date or None,
+            to_date or None,
+            cat_lower,
+            min_amount,
+            max_amount
+        )
+        if predicate is None:
+            return iter(expenses)
         
-        # Filter by amount range
-        if min_amount is not None:
-            filtered = [e for e in filtered if e.amount >= min_amount]
-        if max_amount is not None:
-            filtered = [e for e in filtered if e.amount <= max_amount]
-        
-        return filtered
+        # Single lazy pass with one specialized predicate per expense
+        return filter(predicate, expenses)
     
     def _sort_expenses(
         self,
@@ -179,32 +338,84 @@ class ExpenseService:
         descending: bool = False
     ) -> List[Expense]:
 
-        # Map sort field to expense attribute
-        sort_keys = {
-            'date': lambda e: e.date,
-            'amount': lambda e: e.amount,
-            'category': lambda e: e.category
-        }
-        
-        if sort_by not in sort_keys:
+        if sort_by not in self.SORT_KEYS:
             return expenses
         
-        return sorted(expenses, key=sort_keys[sort_by], reverse=descending)
+        # Callers pass a freshly built list, so sort it in place (no copy)
+        expenses.sort(key=self.SORT_KEYS[sort_by], reverse=descending)
+        return expenses
     
-    def _calculate_summary(self, expenses: List[Expense]) -> Dict:
-        count = len(expenses)
-        grand_total = sum(e.amount for e in expenses)
+    def _top_expenses(
+        self,
+        expenses: Iterable[Expense],
+        sort_by: str,
+        descending: bool,
+        limit: int
+    ) -> List[Expense]:
+
+        if sort_by not in self.SORT_KEYS:
+            return list(islice(expenses, limit))
         
-        # Calculate totals by category
-        totals_by_category = {}
-        for expense in expenses:
-            cat = expense.category
-            if cat not in totals_by_category:
-                totals_by_category[cat] = 0
-            totals_by_category[cat] += expense.amount
+        # Partial heap selection: O(N log k) instead of a full sort
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(limit, expenses, key=self.SORT_KEYS[sort_by])
+    
+    def _filtered_summary(
+        self,
+        columns: _Columns,
+        month: str = None,
+        from_date: str = None,
+        to_date: str = None,
+        category: str = None
+    ) -> Dict:
+
+        dates, codes, amounts, table = columns
         
+        # Narrow to the date window by bisecting the date-sorted column:
+        # O(log N) to find the rows instead of comparing every date
+        lo, hi = 0, len(dates)
+        if month:
+            # Every date starting with `month` sorts within [month, month + max char)
+            lo = max(lo, bisect_left(dates, month))
+            hi = min(hi, bisect_left(dates, month + _MAX_CHAR))
+        if from_date:
+            lo = max(lo, bisect_left(dates, from_date))
+        if to_date:
+            hi = min(hi, bisect_right(dates, to_date))
+        
+        if lo >= hi:
+            return _empty_summary()
+        
+        window_codes = codes[lo:hi]
+        window_amounts = amounts[lo:hi]
+        
+        # No category filter: per-category totals accumulate into a flat
+        # list indexed by category code
+        if not category:
+            totals = [0.0] * len(table)
+            for code, amount in zip(window_codes, window_amounts):
+                totals[code] += amount
+            return {
+                'count': hi - lo,
+                'grand_total': sum(window_amounts),
+                'totals_by_category': {
+                    table[code]: totals[code] for code in sorted(set(window_codes))
+                }
+            }
+        
+        # Category filter: compare int codes; an unknown category matches nothing
+        cat_lower = category.lower()
+        position = bisect_left(table, cat_lower)
+        if position == len(table) or table[position] != cat_lower:
+            return _empty_summary()
+        
+        count = window_codes.count(position)
+        if not count:
+            return _empty_summary()
+        
+        grand_total = sum(compress(window_amounts, map(position.__eq__, window_codes)))
         return {
             'count': count,
             'grand_total': grand_total,
-            'totals_by_category': totals_by_category
-        }
\ No newline at end of file
+            'totals_by_category': {cat_lower: grand_total}
+        }
@@ -1,20 +1,136 @@
 """
 Storage layer for expense tracker application.
 Handles reading/writing expenses to JSON file with version control.
+
+Changes are recorded in an append-only write-ahead log (``<file>.wal``, one
+JSON record per line) and folded back into the JSON file by checkpoint().
 """
 
+import atexit
+import hashlib
 import json
+import math
+import mmap
 import os
-from typing import List
+import weakref
+from functools import partial
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional, Tuple
 from tracker.models import Expense
 
+try:
+    # Optional: much faster JSON encode/decode when installed
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Stdlib encoders built once and reused; json.dumps with any non-default
+# option constructs a fresh JSONEncoder on every call
+_record_encoder = json.JSONEncoder(default=Expense.to_dict, ensure_ascii=False)
+_compact_encoder = json.JSONEncoder(default=Expense.to_dict, separators=(',', ':'), ensure_ascii=False)
+_pretty_encoder = json.JSONEncoder(default=Expense.to_dict, indent=2, ensure_ascii=False)
+
+_amount = attrgetter("amount")
+
+
+def _orjson_safe(expenses) -> bool:
+    """
+    Whether orjson can encode these expenses faithfully.
+    
+    orjson writes inf/nan as null, which would no longer load; such payloads
+    go through the stdlib encoder, which writes Infinity/NaN.
+    
+    Args:
+        expenses: Iterable of Expense objects
+        
+    Returns:
+        True if every amount is finite
+    """
+    # The sum is finite only if every amount is; a sum that overflows just
+    # sends a finite payload down the slower stdlib path
+    return math.isfinite(sum(map(_amount, expenses)))
+
+
+def _encode_record(record: dict) -> bytes:
+    """
+    Encode a WAL record as one line of UTF-8 JSON.
+    
+    Args:
+        record: Change record (Expense values are converted via to_dict)
+        
+    Returns:
+        Encoded line including the trailing newline
+    """
+    expense = record.get("expense")
+    if orjson is not None and (expense is None or _orjson_safe((expense,))):
+        return orjson.dumps(record, default=Expense.to_dict) + b"\n"
+    return (_record_encoder.encode(record) + "\n").encode('utf-8')
+
+
+def _encode_document(data: dict, pretty: bool = False) -> bytes:
+    """
+    Encode the data file contents as UTF-8 JSON.
+    
+    Args:
+        data: Dictionary to encode (Expense values are converted via to_dict)
+        pretty: Indent for human reading instead of the compact on-disk form
+        
+    Returns:
+        Encoded document
+    """
+    if orjson is not None and _orjson_safe(data.get("expenses", ())):
+        return orjson.dumps(data, default=Expense.to_dict, option=orjson.OPT_INDENT_2 if pretty else 0)
+    encoder = _pretty_encoder if pretty else _compact_encoder
+    return encoder.encode(data).encode('utf-8')
+
+
+def _decode(text):
+    """Decode a JSON document from str, bytes or a memoryview."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson rejects the Infinity/NaN tokens the stdlib encoder writes;
+            # let json decide (and report genuine corruption)
+            if isinstance(text, memoryview):
+                text = text.tobytes()
+    return json.loads(text)
+
+
+def _flush_at_exit(storage_ref: weakref.ref):
+    """
+    atexit hook: flush a storage that is still alive.
+    
+    Holds only a weak reference, so registering it does not keep the storage
+    (and its cache) alive. There is no caller left to report to at exit, so
+    a failure is logged rather than raised.
+    
+    Args:
+        storage_ref: Weak reference to an ExpenseStorage
+    """
+    storage = storage_ref()
+    if storage is None:
+        return
+    try:
+        storage.flush()
+    except Exception as e:
+        from tracker.logger import log_error
+        log_error("FlushError", str(e))
+
 
 class ExpenseStorage:
     """
     Handles persistent storage of expenses in JSON format.
+    
+    Mutations are applied to an in-memory cache and written to disk in one
+    go by flush(), which runs when the storage is used as a context manager
+    exits, or at interpreter exit for one that is not.
     """
     
     VERSION = 1  # JSON schema version
+    WAL_CHECKPOINT_BYTES = 1 << 20  # Fold the WAL into the JSON file past this size
+    MMAP_THRESHOLD_BYTES = 1 << 20  # Parse larger files straight from a memory map
     
     def __init__(self, data_dir: str = "data", filename: str = "expenses.json"):
         """
@@ -27,82 +143,469 @@ class ExpenseStorage:
         self.data_dir = data_dir
         self.filename = filename
         self.filepath = os.path.join(data_dir, filename)
-        self._ensure_data_dir()
+        self.wal_path = self.filepath + ".wal"
+        os.makedirs(self.data_dir, exist_ok=True)
+        
+        # Parsed expenses and the file mtimes they were read at
+        self._cache: Optional[List[Expense]] = None
+        self._cache_mtime: Optional[Tuple] = None
+        
+        # Bumped whenever the cached expenses change (re-read or mutated), so
+        # callers can tell whether anything derived from them is stale
+        self.generation = 0
+        
+        # Expense ID -> position of its first occurrence in the cache
+        self._index: Optional[Dict[str, int]] = None
+        
+        # Sequence number of the last change applied (JSON file + WAL)
+        self._seq = 0
+        
+        # Changes not yet written to disk
+        self._pending: List[dict] = []
+        self._needs_checkpoint = False
+        self._dirty = False
+        self._exit_hook = partial(_flush_at_exit, weakref.ref(self))
+        atexit.register(self._exit_hook)
+        
+        # Digest of the last payload written and the file stat right after,
+        # used to skip rewriting an unchanged file
+        self._last_write: Optional[Tuple[bytes, Tuple]] = None
     
-    def _ensure_data_dir(self):
-        """Create data directory if it doesn't exist."""
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
+    def __enter__(self) -> 'ExpenseStorage':
+        return self
     
-    def _ensure_file_exists(self):
-        """Create empty expenses file if it doesn't exist."""
-        self._ensure_data_dir()
-        if not os.path.exists(self.filepath):
-            self._write_data({"version": self.VERSION, "expenses": []})
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Flushed here, so the exit hook would only repeat a failure
+        try:
+            self.flush()
+        finally:
+            atexit.unregister(self._exit_hook)
+    
+    def _open_for_write(self, path: str, mode: str):
+        """
+        Open a file in the data directory for writing.
+        
+        The directory is created in __init__; it is only re-created here if
+        it has been removed since.
+        """
+        try:
+            return open(path, mode)
+        except FileNotFoundError:
+            os.makedirs(self.data_dir, exist_ok=True)
+            return open(path, mode)
+    
+    def mtime(self) -> Tuple:
+        """
+        Modification stamp of the stored data (JSON file and WAL).
+        
+        Returns:
+            Tuple that changes whenever either file is written
+        """
+        stamp = []
+        for path in (self.filepath, self.wal_path):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
     
     def load_expenses(self) -> List[Expense]:
         """
         Load all expenses from JSON file.
         
+        The parsed list is cached in memory and only re-read when the file
+        changes on disk.
+        
         Returns:
-            List of Expense objects
-            
+            List of Expense objects (a copy; safe to modify)
+        
+        Raises:
+            Exception: If file is corrupted or cannot be read
+        """
+        return list(self._load_cache())
+    
+    def iter_expenses(self) -> Iterator[Expense]:
+        """
+        Iterate over the cached expenses without copying them.
+        
+        The cache is brought up to date first, so generation is current once
+        this returns. Consume the iterator before mutating the storage.
+        
+        Returns:
+            Iterator over the cached Expense objects
+        
+        Raises:
+            Exception: If file is corrupted or cannot be read
+        """
+        return iter(self._load_cache())
+    
+    def _load_cache(self) -> List[Expense]:
+        """
+        Return the cached expense list, re-reading the file if it changed.
+        
+        Pending (unflushed) changes always win over the file on disk.
+        
+        Returns:
+            Cached list of Expense objects (mutated in place by writers)
+        
         Raises:
             Exception: If file is corrupted or cannot be read
         """
-        self._ensure_file_exists()
+        if self._dirty:
+            return self._cache
+        
+        # The stamp doubles as the existence check: a missing file has no stat
+        mtime = self.mtime()
+        if mtime[0] is None:
+            self._write_data({"version": self.VERSION, "expenses": []})
+            mtime = self.mtime()
+        
+        if self._cache is not None and mtime == self._cache_mtime:
+            return self._cache
         
+        self._cache = self._read_expenses()
+        self._cache_mtime = mtime
+        self._index = None
+        self.generation += 1
+        return self._cache
+    
+    def _read_expenses(self) -> List[Expense]:
+        """
+        Read and parse all expenses from the JSON file, then replay the WAL.
+        
+        Returns:
+            List of Expense objects
+        
+        Raises:
+            Exception: If file is corrupted or cannot be read
+        """
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_data()
             
             # Handle both old format (list) and new format (dict with version)
             if isinstance(data, list):
                 # Old format: convert to new format
                 expense_list = data
+                self._seq = 0
             else:
                 # New format: extract expenses list
                 expense_list = data.get("expenses", [])
+                self._seq = data.get("wal_seq", 0)
             
-            # Convert dictionaries to Expense objects
-            expenses = [Expense.from_dict(item) for item in expense_list]
-            return expenses
-            
+            # Convert dictionaries to Expense objects in place, so each dict is
+            # freed as soon as it is replaced rather than both full lists
+            # being alive at once
+            del data
+            from_dict = Expense.from_dict
+            for i, item in enumerate(expense_list):
+                expense_list[i] = from_dict(item)
+            expenses = expense_list
+        
         except json.JSONDecodeError as e:
             raise Exception(f"Corrupted data file: {e}")
         except Exception as e:
             raise Exception(f"Error reading expenses: {e}")
+        
+        self._replay_wal(expenses)
+        return expenses
     
-    def save_expense(self, expense: Expense):
+    def _read_data(self):
         """
-        Add a new expense to the storage.
+        Read and decode the JSON data file.
+        
+        Large files are memory-mapped and, with orjson, parsed directly from
+        the mapped pages without copying them into a bytes object. Otherwise
+        the whole file is read at once and parsed from the buffer.
+        
+        Returns:
+            Decoded JSON document
+        """
+        with open(self.filepath, 'rb') as f:
+            if orjson is not None and os.fstat(f.fileno()).st_size > self.MMAP_THRESHOLD_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return _decode(view)
+            return _decode(f.read())
+    
+    def _replay_wal(self, expenses: List[Expense]):
+        """
+        Apply WAL records newer than the last checkpoint to expenses.
         
         Args:
-            expense: Expense object to save
-            
+            expenses: Expenses loaded from the JSON file (modified in place)
+        
         Raises:
-            Exception: If file cannot be written
+            Exception: If the WAL is corrupted or cannot be read
+        """
+        # Read raw bytes: a torn tail may end inside a multi-byte character,
+        # which must not stop the complete lines from being decoded
+        try:
+            with open(self.wal_path, 'rb') as f:
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            raise Exception(f"Error reading write-ahead log: {e}")
+        
+        # A record only counts once its newline is written. Whatever follows
+        # the last newline is a torn append: skip it, as _append_wal will
+        # trim it, even if it happens to be complete JSON.
+        lines.pop()
+        
+        # Decode every line in one call by splicing them into a JSON array;
+        # only a corrupted log needs the line-by-line path
+        try:
+            records = _decode(b"[" + b",".join(line for line in lines if line) + b"]")
+        except ValueError:
+            records = self._decode_wal_lines(lines)
+        
+        for record in records:
+            # Records already folded into the JSON file are skipped
+            if record["seq"] <= self._seq:
+                continue
+            self._apply(expenses, record)
+            self._seq = record["seq"]
+    
+    def _decode_wal_lines(self, lines: List[bytes]) -> List[dict]:
         """
-        # Load existing expenses
-        expenses = self.load_expenses()
+        Decode complete WAL lines one at a time to locate a corrupted one.
+        
+        Args:
+            lines: Newline-terminated WAL lines (torn tail already removed)
         
-        # Add new expense
-        expenses.append(expense)
+        Returns:
+            Decoded change records
         
-        # Write back to file
-        self._write_expenses(expenses)
+        Raises:
+            Exception: If any line is corrupted
+        """
+        records = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                records.append(_decode(line))
+            except ValueError as e:
+                raise Exception(f"Corrupted write-ahead log: {e}")
+        return records
+    
+    def _apply(self, expenses: List[Expense], record: dict) -> bool:
+        """
+        Apply a single change record to an expense list.
+        
+        Args:
+            expenses: Expense list to modify in place
+            record: Change record ('add', 'del' or 'upd')
+        
+        Returns:
+            True if the list changed, False if the target ID was not found
+        """
+        op = record["op"]
+        
+        # Live records carry the Expense itself; replayed ones a plain dict
+        expense = record.get("expense")
+        if isinstance(expense, dict):
+            expense = Expense.from_dict(expense)
+        
+        if op == "add":
+            expenses.append(expense)
+            return True
+        
+        if op == "del":
+            # Filter out the expense with matching ID
+            initial_count = len(expenses)
+            expenses[:] = [exp for exp in expenses if exp.id != record["id"]]
+            return len(expenses) != initial_count
+        
+        if op == "upd":
+            # Find and update the expense
+            for i, exp in enumerate(expenses):
+                if exp.id == record["id"]:
+                    expenses[i] = expense
+                    return True
+            return False
+        
+        raise Exception(f"Unknown write-ahead log operation: {op}")
+    
+    def _get_index(self, expenses: List[Expense]) -> Dict[str, int]:
+        """
+        Return the ID -> position index for the cache, building it if needed.
+        
+        Args:
+            expenses: The current cache, as just returned by _load_cache()
+        
+        Returns:
+            Dict mapping each expense ID to its first position in the cache
+        """
+        if self._index is None:
+            index: Dict[str, int] = {}
+            for i, exp in enumerate(expenses):
+                index.setdefault(exp.id, i)
+            self._index = index
+        return self._index
+    
+    def _record(self, record: dict) -> bool:
+        """
+        Apply a change to the cache and queue it for the WAL.
+        
+        Args:
+            record: Change record without a sequence number
+        
+        Returns:
+            True if the change applied, False if the target ID was not found
+        
+        Raises:
+            Exception: If existing expenses cannot be read
+        """
+        expenses = self._load_cache()
+        index = self._get_index(expenses)
+        op = record["op"]
+        
+        if op == "add":
+            expense = record["expense"]
+            index.setdefault(expense.id, len(expenses))
+            expenses.append(expense)
+        elif record["id"] not in index:
+            return False
+        elif op == "upd":
+            expense = record["expense"]
+            expenses[index[record["id"]]] = expense
+            if expense.id != record["id"]:
+                self._index = None
+        else:
+            # Deleting keeps the remaining order, so positions shift
+            self._apply(expenses, record)
+            self._index = None
+        
+        self._seq += 1
+        self._pending.append({"seq": self._seq, **record})
+        self.generation += 1
+        
+        # Defer the write to flush()
+        self._dirty = True
+        return True
+    
+    def save_expense(self, expense: Expense):
+        """
+        Add a new expense to the storage (written on flush).
+        
+        Args:
+            expense: Expense object to save
+        
+        Raises:
+            Exception: If existing expenses cannot be read
+        """
+        self._record({"op": "add", "expense": expense})
     
     def save_all_expenses(self, expenses: List[Expense]):
         """
-        Replace all expenses with the provided list.
+        Replace all expenses with the provided list (written on flush).
         
         Args:
             expenses: List of Expense objects to save
-            
+        
+        Raises:
+            Exception: If existing expenses cannot be read
+        """
+        # Replay the WAL first so _seq covers every record in it: the
+        # checkpoint stamps that as wal_seq before removing the WAL, and a
+        # crash in between must not re-apply old records to the new list
+        self._load_cache()
+        
+        self._cache = list(expenses)
+        self._index = None
+        self.generation += 1
+        self._pending = []
+        self._needs_checkpoint = True
+        self._dirty = True
+    
+    def flush(self):
+        """
+        Write pending changes to disk, if any.
+        
+        Changes are appended to the WAL in a single write; the JSON file is
+        only rewritten when a checkpoint is due.
+        
+        Raises:
+            Exception: If file cannot be written (changes stay pending)
+        """
+        if not self._dirty:
+            return
+        
+        if self._needs_checkpoint or self._wal_size() >= self.WAL_CHECKPOINT_BYTES:
+            self._checkpoint()
+        else:
+            self._append_wal(self._pending)
+        
+        self._pending = []
+        self._needs_checkpoint = False
+        self._dirty = False
+        self._cache_mtime = self.mtime()
+    
+    def checkpoint(self):
+        """
+        Fold the WAL into the JSON file and truncate it.
+        
+        Raises:
+            Exception: If file cannot be read or written
+        """
+        self._load_cache()
+        self._checkpoint()
+        self._pending = []
+        self._needs_checkpoint = False
+        self._dirty = False
+        self._cache_mtime = self.mtime()
+    
+    def _checkpoint(self):
+        """
+        Rewrite the JSON file from the cache, then remove the WAL.
+        
+        The JSON file records the last sequence number it contains, so a
+        crash before the WAL is removed cannot apply a change twice.
+        
         Raises:
             Exception: If file cannot be written
         """
-        self._write_expenses(expenses)
+        self._write_expenses(self._cache)
+        try:
+            os.remove(self.wal_path)
+        except FileNotFoundError:
+            pass
+    
+    def _wal_size(self) -> int:
+        """Return the current WAL size in bytes (0 if absent)."""
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+    
+    def _append_wal(self, records: List[dict]):
+        """
+        Append change records to the WAL, one JSON object per line.
+        
+        Args:
+            records: Change records to append
+        
+        Raises:
+            Exception: If the WAL cannot be written
+        """
+        if not records:
+            return
+        
+        try:
+            payload = b"".join(_encode_record(record) for record in records)
+            with self._open_for_write(self.wal_path, 'a+b') as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(size - 1)
+                    if f.read(1) != b"\n":
+                        # Drop a torn record left by an interrupted append
+                        f.seek(0)
+                        f.truncate(f.read().rfind(b"\n") + 1)
+                f.write(payload)
+        except Exception as e:
+            raise Exception(f"Error writing to write-ahead log: {e}")
     
     def _write_expenses(self, expenses: List[Expense]):
         """
@@ -110,68 +613,107 @@ class ExpenseStorage:
         
         Args:
             expenses: List of Expense objects to write
-            
+        
         Raises:
             Exception: If file cannot be written
         """
         try:
-            # Convert Expense objects to dictionaries
-            expense_list = [expense.to_dict() for expense in expenses]
-            
-            # Create data structure with version
-            data = {
-                "version": self.VERSION,
-                "expenses": expense_list
-            }
-            
-            # Write to file
-            self._write_data(data)
-                
+            self._write_data(self._document(expenses))
+        
         except Exception as e:
             raise Exception(f"Error writing expenses: {e}")
     
+    def _document(self, expenses: List[Expense]) -> dict:
+        """
+        Build the versioned data file contents for a list of expenses.
+        
+        Args:
+            expenses: List of Expense objects
+        
+        Returns:
+            Dictionary ready to encode
+        """
+        # Expenses stay objects: the encoder converts each one via to_dict as
+        # it goes instead of a full list of dicts being built up front
+        return {
+            "version": self.VERSION,
+            "wal_seq": self._seq,
+            "expenses": expenses
+        }
+    
+    def export(self, pretty: bool = True) -> str:
+        """
+        Render all expenses, including unflushed changes, as JSON.
+        
+        The data file itself is stored compactly; this is the readable view.
+        
+        Args:
+            pretty: Indent the output (default: True)
+        
+        Returns:
+            JSON document in the data file format
+        
+        Raises:
+            Exception: If existing expenses cannot be read
+        """
+        expenses = self._load_cache()
+        return _encode_document(self._document(expenses), pretty=pretty).decode('utf-8')
+    
     def _write_data(self, data: dict):
         """
         Write data to JSON file.
         
         Args:
             data: Dictionary to write
-            
+        
         Raises:
             Exception: If file cannot be written
         """
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Serialize fully, then hand the file a single write
+            payload = _encode_document(data)
+            
+            # Skip the write if we already wrote these exact bytes and the
+            # file has not been touched since
+            digest = hashlib.blake2b(payload, digest_size=8).digest()
+            if self._last_write and self._last_write == (digest, self._file_stamp()):
+                return
+            
+            # Write a temp file and atomically swap it in, so an interrupted
+            # write can never leave a half-written data file behind
+            tmp_path = self.filepath + '.tmp'
+            with self._open_for_write(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filepath)
+            
+            self._last_write = (digest, self._file_stamp())
         except Exception as e:
             raise Exception(f"Error writing to file: {e}")
     
+    def _file_stamp(self) -> Optional[Tuple]:
+        """Return (mtime_ns, size, inode) of the data file, or None if missing."""
+        try:
+            st = os.stat(self.filepath)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
     def delete_expense(self, expense_id: str) -> bool:
         """
         Delete an expense by ID.
         
         Args:
             expense_id: ID of the expense to delete
-            
+        
         Returns:
             True if deleted, False if not found
-            
+        
         Raises:
-            Exception: If file cannot be written
+            Exception: If existing expenses cannot be read
         """
-        expenses = self.load_expenses()
-        
-        # Filter out the expense with matching ID
-        initial_count = len(expenses)
-        expenses = [exp for exp in expenses if exp.id != expense_id]
-        
-        # Check if anything was deleted
-        if len(expenses) == initial_count:
-            return False
-        
-        # Save updated list
-        self._write_expenses(expenses)
-        return True
+        return self._record({"op": "del", "id": expense_id})
     
     def update_expense(self, expense_id: str, updated_expense: Expense) -> bool:
         """
@@ -180,29 +722,14 @@ class ExpenseStorage:
         Args:
             expense_id: ID of the expense to update
             updated_expense: New expense data
-            
+        
         Returns:
             True if updated, False if not found
-            
+        
         Raises:
-            Exception: If file cannot be written
+            Exception: If existing expenses cannot be read
         """
-        expenses = self.load_expenses()
-        
-        # Find and update the expense
-        found = False
-        for i, exp in enumerate(expenses):
-            if exp.id == expense_id:
-                expenses[i] = updated_expense
-                found = True
-                break
-        
-        if not found:
-            return False
-        
-        # Save updated list
-        self._write_expenses(expenses)
-        return True
+        return self._record({"op": "upd", "id": expense_id, "expense": updated_expense})
     
     def get_expense_by_id(self, expense_id: str) -> Expense:
         """
@@ -210,14 +737,13 @@ class ExpenseStorage:
         
         Args:
             expense_id: ID of the expense to retrieve
-            
+        
         Returns:
             Expense object if found, None otherwise
         """
-        expenses = self.load_expenses()
-        
-        for exp in expenses:
-            if exp.id == expense_id:
-                return exp
+        expenses = self._load_cache()
+        position = self._get_index(expenses).get(expense_id)
+        if position is None:
+            return None
         
-        return None
\ No newline at end of file
+        return expenses[position]
@@ -2,9 +2,16 @@
 Utility functions for parsing and validation.
 """
 
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 
 
+class _NonPositive(ValueError):
+    """Amount parsed as a number but is not > 0 (kept apart from parse errors)."""
+
+
+# Pure, and bulk input repeats the same dates: memoize
+@lru_cache(maxsize=1024)
 def parse_date(date_str: str) -> str:
     """
     Parse and validate date string.
@@ -18,6 +25,16 @@ def parse_date(date_str: str) -> str:
     Raises:
         ValueError: If date format is invalid
     """
+    # Fast path: fromisoformat is implemented in C. The shape check keeps
+    # newer Pythons from accepting other ISO forms such as 20260126.
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        try:
+            date.fromisoformat(date_str)
+            return date_str
+        except ValueError:
+            pass
+    
+    # Slow path keeps strptime's exact acceptance rules (e.g. 2026-1-05)
     try:
         datetime.strptime(date_str, "%Y-%m-%d")
         return date_str
@@ -41,14 +58,16 @@ def parse_amount(amount) -> float:
     try:
         amount = float(amount)
         if amount <= 0:
-            raise ValueError("amount must be > 0")
+            raise _NonPositive("amount must be > 0")
         return amount
-    except (TypeError, ValueError) as e:
-        if "amount must be > 0" in str(e):
-            raise
+    except _NonPositive:
+        raise
+    except (TypeError, ValueError):
         raise ValueError("amount must be a valid number")
 
 
+# Categories come from a small fixed set, so nearly every call is a hit
+@lru_cache(maxsize=512)
 def parse_category(category: str) -> str:
     """
     Parse and validate category.
@@ -101,8 +120,10 @@ def format_summary_output(summary: dict) -> str:
     if summary['totals_by_category']:
         output.append("By Category:")
         output.append("-" * 60)
-        for category, total in sorted(summary['totals_by_category'].items()):
-            output.append(f"  {category.capitalize():20} {total:>10.2f} BDT")
+        output.append("\n".join(
+            "  %-20s %10.2f BDT" % (category.capitalize(), total)
+            for category, total in sorted(summary['totals_by_category'].items())
+        ))
         output.append("=" * 60)
     else:
         output.append("No expenses found")